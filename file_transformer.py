@@ -17,13 +17,38 @@ limitations under the License.
 
 __version__ = "1.2.0"
 
-import argparse
+import functools
+import io
 import sys
-import six
 
 DEFAULT_TO_BINARY_MODE = False
 
-class _FileTransformer(object):
+BINARY_OUTPUT_BUFFER_SIZE = 1 << 20
+
+READ_CHUNK_SIZE = 1 << 20
+
+def _add_arguments(parser, positional_args):
+    if positional_args:
+        parser.add_argument('files', nargs='*')
+    
+    parser.add_argument('-i', '--input', metavar='FILE')
+    parser.add_argument('-o', '--output', metavar='FILE')
+    parser.add_argument('-q', '--quiet', action='store_true', help="Suppress error messages")
+
+def _new_parser(description, positional_args):
+    import argparse
+    parser = argparse.ArgumentParser(description=description)
+    _add_arguments(parser, positional_args)
+    return parser
+
+@functools.lru_cache()
+def _get_default_parser(description, positional_args):
+    """Returns a parser that is reused across calls with no hooks, since
+    parsing arguments does not modify it. Parsers that a hook can modify
+    must not share it or its actions."""
+    return _new_parser(description, positional_args)
+
+class _FileTransformer:
     
     @classmethod
     def description(cls):
@@ -38,8 +63,6 @@ class _FileTransformer(object):
             positional_args=None,
             parse_known_args=None,
             ):
-        self.parser = parser or argparse.ArgumentParser(description=self.description())
-
         self.args_to_parse = args_to_parse
         
         if parse_known_args is None:
@@ -48,12 +71,14 @@ class _FileTransformer(object):
         if positional_args is None:
             positional_args = not parse_known_args
         
-        if positional_args:
-            self.parser.add_argument('files', nargs='*')
-        
-        self.parser.add_argument('-i', '--input', metavar='FILE')
-        self.parser.add_argument('-o', '--output', metavar='FILE')
-        self.parser.add_argument('-q', '--quiet', action='store_true', help="Suppress error messages")
+        if parser is None:
+            if pre_parse_hook is None and post_parse_hook is None:
+                parser = _get_default_parser(self.description(), positional_args)
+            else:
+                parser = _new_parser(self.description(), positional_args)
+        else:
+            _add_arguments(parser, positional_args)
+        self.parser = parser
         
         if pre_parse_hook:
             pre_parse_hook(self.parser)
@@ -89,9 +114,9 @@ class _FileTransformer(object):
                 message = message + '\n'
             self.parser.exit(code, message)
     
-    def _open_file(self, name, mode):
+    def _open_file(self, name, mode, buffer_size=-1):
         try:
-            return open(name, mode, 1)
+            return open(name, mode, buffering=buffer_size)
         except Exception as e:
             self.exit(2, "Could not open file {}: {}".format(name, e))
     
@@ -103,6 +128,8 @@ class _FileTransformer(object):
             input_stream = self._open_file(self.input, mode)
         elif len(self.files) >= 1:
             input_stream = self._open_file(self.files[0],mode)
+        elif binary:
+            input_stream = getattr(sys.stdin, 'buffer', sys.stdin)
         else:
             input_stream = sys.stdin
         return input_stream
@@ -111,10 +138,13 @@ class _FileTransformer(object):
         if binary is None:
             binary = DEFAULT_TO_BINARY_MODE
         mode = 'wb' if binary else 'w'
+        buffer_size = BINARY_OUTPUT_BUFFER_SIZE if binary else -1
         if self.output:
-            output_stream = self._open_file(self.output, mode)
+            output_stream = self._open_file(self.output, mode, buffer_size=buffer_size)
         elif len(self.files) == 2:
-            output_stream = self._open_file(self.files[1], mode)
+            output_stream = self._open_file(self.files[1], mode, buffer_size=buffer_size)
+        elif binary:
+            output_stream = getattr(sys.stdout, 'buffer', sys.stdout)
         else:
             output_stream = sys.stdout
         return output_stream
@@ -124,15 +154,14 @@ class _FileTransformer(object):
             loader=None,
             dumper=None):
 
-        input_binary = DEFAULT_TO_BINARY_MODE
-        output_binary = DEFAULT_TO_BINARY_MODE
-        if hasattr(processor, 'binary'):
-            input_binary = getattr(processor, 'binary')
-            output_binary = getattr(processor, 'binary')
-        if hasattr(loader, 'binary'):
-            input_binary = getattr(loader, 'binary')
-        if hasattr(dumper, 'binary'):
-            output_binary = getattr(dumper, 'binary')
+        if getattr(processor, 'streaming', False):
+            if loader or dumper:
+                raise ValueError("A streaming processor can't be used with a loader or dumper")
+            return self.stream(processor)
+
+        processor_binary = getattr(processor, 'binary', DEFAULT_TO_BINARY_MODE)
+        input_binary = getattr(loader, 'binary', processor_binary)
+        output_binary = getattr(dumper, 'binary', processor_binary)
 
         try:
             with self._open_input_stream(binary=input_binary) as input_stream:
@@ -142,6 +171,9 @@ class _FileTransformer(object):
                     input = input_stream.read()
             
             output = processor(input, self.args)
+            # release the input before the output is written, so both aren't
+            # held in memory while dumping
+            del input
                     
             with self._open_output_stream(binary=output_binary) as output_stream:
                 if dumper:
@@ -199,7 +231,10 @@ def main(processor,
     
     The processor is called with the input (bytestring or output from loader) and
     the parsed args object, and should return the output to write to the file,
-    normally a bytestring.
+    normally a bytestring. If the processor has a true attribute named streaming,
+    it is instead run as in streaming_main(), and no loader or dumper may be
+    given. The PASSTHROUGH processor copies the input to the output unchanged,
+    without reading it into memory.
     
     If the output of the processor can't be directly written to the output stream,
     a callable dumper can be provided, which takes the output from processor, the
@@ -208,6 +243,8 @@ def main(processor,
     By default, the files are opened in text mode. If binary is desired,
     the module field DEFAULT_TO_BINARY_MODE can be set to true. If processor,
     loader, or dumper have an attribute named binary, that will be used instead.
+    Output files opened in binary mode use a buffer of BINARY_OUTPUT_BUFFER_SIZE
+    bytes.
 
     Errors are printed to stdout unless the -q flag is given.
     """ 
@@ -242,26 +279,141 @@ def streaming_main(processor,
     
     return xformer.stream(processor)
 
+def _is_regular_file(stream):
+    import os, stat
+    try:
+        return stat.S_ISREG(os.fstat(stream.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+def _copy_with_sendfile(input_stream, output_stream):
+    """Copies with sendfile(), returning False without copying anything if
+    the kernel does not support it for these files, e.g. when the output was
+    opened with O_APPEND"""
+    import os, errno
+    output_stream.flush()
+    in_fd = input_stream.fileno()
+    out_fd = output_stream.fileno()
+    start = offset = input_stream.tell()
+    size = os.fstat(in_fd).st_size
+    while offset < size:
+        try:
+            sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+        except OSError as e:
+            if offset == start and e.errno in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP):
+                return False
+            raise
+        if not sent:
+            break
+        offset += sent
+    input_stream.seek(offset)
+    output_stream.seek(os.lseek(out_fd, 0, os.SEEK_CUR))
+    return True
+
+def copy_stream(input_stream, output_stream):
+    """Copy the rest of input_stream to output_stream, for use in streaming
+    processors. On Linux, if both are seekable binary streams backed by regular
+    files, the copy is done in the kernel with sendfile() where possible."""
+    if (sys.platform.startswith('linux')
+            and not isinstance(input_stream, io.TextIOBase)
+            and not isinstance(output_stream, io.TextIOBase)
+            and input_stream.seekable()
+            and _is_regular_file(input_stream)
+            and _is_regular_file(output_stream)
+            and _copy_with_sendfile(input_stream, output_stream)):
+        return
+    import shutil
+    shutil.copyfileobj(input_stream, output_stream, READ_CHUNK_SIZE)
+
+class _Passthrough:
+    """Streaming processor that copies the input to the output unchanged"""
+    __slots__ = ()
+    streaming = True
+    binary = True
+    
+    def __call__(self, input_stream, output_stream, args):
+        copy_stream(input_stream, output_stream)
+
+PASSTHROUGH = _Passthrough()
+
+class _IOFunction:
+    """Wraps a loader or dumper with a fixed binary attribute, set on the
+    class rather than on the function"""
+    __slots__ = ('func',)
+    
+    def __init__(self, func):
+        self.func = func
+    
+    def __call__(self, *args):
+        return self.func(*args)
+
+class _BinaryIOFunction(_IOFunction):
+    __slots__ = ()
+    binary = True
+
+class _TextIOFunction(_IOFunction):
+    __slots__ = ()
+    binary = False
+
+_LIB_CACHE = {}
+
 def _get_lib(lib, default_lib_name):
     if lib:
         return lib
-    import importlib
-    return importlib.import_module(default_lib_name)
+    if default_lib_name not in _LIB_CACHE:
+        import importlib
+        _LIB_CACHE[default_lib_name] = importlib.import_module(default_lib_name)
+    return _LIB_CACHE[default_lib_name]
 
 def get_io_functions_from_lib(lib, load_func_name='load', dump_func_name='dump', load_kwargs={}, dump_kwargs={}):
     """Helper to create loader and dumper functions for libraries"""
-    def loader(input_stream, args):
-        return getattr(lib, load_func_name)(input_stream, **load_kwargs)
-    def dumper(output, output_stream, args):
-        return getattr(lib, dump_func_name)(output, output_stream, **dump_kwargs)
+    load_func = getattr(lib, load_func_name)
+    dump_func = getattr(lib, dump_func_name)
+    if load_kwargs:
+        def loader(input_stream, args):
+            return load_func(input_stream, **load_kwargs)
+    else:
+        def loader(input_stream, args):
+            return load_func(input_stream)
+    if dump_kwargs:
+        def dumper(output, output_stream, args):
+            return dump_func(output, output_stream, **dump_kwargs)
+    else:
+        def dumper(output, output_stream, args):
+            return dump_func(output, output_stream)
     return loader, dumper
 
 def get_pickle_io(load_kwargs={}, dump_kwargs={}, picklelib=None):
     """Returns a loader and dumper for Pickle files"""
     return get_io_functions_from_lib(_get_lib(picklelib, 'pickle'), 'load', 'dump', load_kwargs=load_kwargs, dump_kwargs=dump_kwargs)
 
-def get_json_io(load_kwargs={}, dump_kwargs={}, jsonlib=None):
-    """Returns a loader and dumper for JSON"""
+def _get_orjson_io(orjson, load_kwargs={}, dump_kwargs={}):
+    def loader(input_stream, args):
+        return orjson.loads(input_stream.read(), **load_kwargs)
+    def dumper(output, output_stream, args):
+        output_stream.write(orjson.dumps(output, **dump_kwargs))
+    return _BinaryIOFunction(loader), _BinaryIOFunction(dumper)
+
+def _get_optional_lib(lib_name):
+    """Like _get_lib, but returns None if the library is not installed,
+    and caches that result as well"""
+    if lib_name not in _LIB_CACHE:
+        try:
+            _get_lib(None, lib_name)
+        except ImportError:
+            _LIB_CACHE[lib_name] = None
+    return _LIB_CACHE[lib_name]
+
+def get_json_io(load_kwargs={}, dump_kwargs={}, jsonlib=None, fast=False):
+    """Returns a loader and dumper for JSON. jsonlib can be orjson or any
+    library with json-style load and dump functions. If fast is true and
+    neither jsonlib nor kwargs are given, orjson or ujson is used if installed,
+    otherwise the json module. These libraries are faster, but can differ
+    from the json module in output formatting and in the values they accept"""
+    if jsonlib is None and fast and not load_kwargs and not dump_kwargs:
+        jsonlib = _get_optional_lib('orjson') or _get_optional_lib('ujson')
+    if getattr(jsonlib, '__name__', None) == 'orjson':
+        return _get_orjson_io(jsonlib, load_kwargs=load_kwargs, dump_kwargs=dump_kwargs)
     return get_io_functions_from_lib(_get_lib(jsonlib, 'json'), 'load', 'dump', load_kwargs=load_kwargs, dump_kwargs=dump_kwargs)
 
 def get_yaml_io(load_kwargs={}, dump_kwargs={}, safe=False, yamllib=None):
@@ -270,8 +422,7 @@ def get_yaml_io(load_kwargs={}, dump_kwargs={}, safe=False, yamllib=None):
     dump_func_name = 'safe_dump' if safe else 'dump'
 
     loader, dumper = get_io_functions_from_lib(_get_lib(yamllib, 'yaml'), load_func_name, dump_func_name, load_kwargs=load_kwargs, dump_kwargs=dump_kwargs)
-    dumper.binary = False
-    return loader, dumper
+    return loader, _TextIOFunction(dumper)
 
 def get_ordered_yaml_io(safe=False, yamllib=None, OrderedDict=None):
     if not OrderedDict:
@@ -1,14 +1,13 @@
 from setuptools import setup
 
 def find_version(name):
-    import os.path, codecs, re
+    import os.path, codecs
     here = os.path.abspath(os.path.dirname(__file__))
     with codecs.open(os.path.join(here, name), 'r') as fp:
         version_file = fp.read()
-    version_match = re.search(r"^__version__ = ['\"]([^'\"]*)['\"]",
-                              version_file, re.M)
-    if version_match:
-        return version_match.group(1)
+    for line in version_file.splitlines():
+        if line.startswith('__version__'):
+            return line.split('=', 1)[1].strip().strip('\'"')
     raise RuntimeError("Unable to find version string.")
 
 setup(
@@ -22,13 +21,12 @@ setup(
         "Source code": "https://github.com/benkehoe/file-transformer",
     },
     license='Apache Software License 2.0',
+    python_requires='>=3.5',
     classifiers=(
         'Development Status :: 2 - Beta',
         'Intended Audience :: Developers',
         'Natural Language :: English',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
         'License :: OSI Approved :: Apache Software License',
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import file_transformer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# writes a header, copies the rest of stdin after its first 4 bytes to
+# stdout, and writes a trailer
+COPY_PROG = """
+import sys
+sys.path.insert(0, {here!r})
+import file_transformer
+
+input_stream = sys.stdin.buffer
+output_stream = sys.stdout.buffer
+output_stream.write(b'<' + input_stream.read(4) + b'>')
+file_transformer.copy_stream(input_stream, output_stream)
+output_stream.write(b'END')
+""".format(here=HERE)
+
+class CopyStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data = os.urandom(3 * file_transformer.READ_CHUNK_SIZE + 123)
+        self.input_path = self._path('input.bin')
+        self.output_path = self._path('output.bin')
+        with open(self.input_path, 'wb') as fp:
+            fp.write(self.data)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def _read_output(self):
+        with open(self.output_path, 'rb') as fp:
+            return fp.read()
+
+    def _copy(self, output_mode):
+        with open(self.input_path, 'rb') as input_stream, open(self.output_path, output_mode) as output_stream:
+            output_stream.write(b'HEAD')
+            self.assertEqual(input_stream.read(4), self.data[:4])
+            file_transformer.copy_stream(input_stream, output_stream)
+            self.assertEqual(input_stream.tell(), len(self.data))
+            self.assertEqual(input_stream.read(), b'')
+            output_stream.flush()
+            self.assertEqual(output_stream.tell(), os.path.getsize(self.output_path))
+            output_stream.write(b'TAIL')
+
+    def test_files(self):
+        self._copy('wb')
+        self.assertEqual(self._read_output(), b'HEAD' + self.data[4:] + b'TAIL')
+
+    def test_append(self):
+        with open(self.output_path, 'wb') as fp:
+            fp.write(b'OLD')
+        self._copy('ab')
+        self.assertEqual(self._read_output(), b'OLDHEAD' + self.data[4:] + b'TAIL')
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'sendfile fast path is Linux only')
+    def test_sendfile_rejects_append(self):
+        with open(self.input_path, 'rb') as input_stream, open(self.output_path, 'ab') as output_stream:
+            input_stream.read(4)
+            self.assertFalse(file_transformer._copy_with_sendfile(input_stream, output_stream))
+            self.assertEqual(input_stream.tell(), 4)
+        self.assertEqual(self._read_output(), b'')
+
+    def test_text(self):
+        with open(self.input_path, 'w') as fp:
+            fp.write('line 1\nline 2\n')
+        with open(self.input_path, 'r') as input_stream, open(self.output_path, 'w') as output_stream:
+            input_stream.readline()
+            file_transformer.copy_stream(input_stream, output_stream)
+        self.assertEqual(self._read_output(), b'line 2\n')
+
+    def _run(self, stdin, stdout):
+        subprocess.check_call([sys.executable, '-c', COPY_PROG], stdin=stdin, stdout=stdout)
+
+    def _expected(self):
+        return b'<' + self.data[:4] + b'>' + self.data[4:] + b'END'
+
+    def test_redirect(self):
+        with open(self.input_path, 'rb') as stdin, open(self.output_path, 'wb') as stdout:
+            self._run(stdin, stdout)
+        self.assertEqual(self._read_output(), self._expected())
+
+    def test_redirect_append(self):
+        with open(self.output_path, 'wb') as fp:
+            fp.write(b'OLD')
+        with open(self.input_path, 'rb') as stdin, open(self.output_path, 'ab') as stdout:
+            self._run(stdin, stdout)
+        self.assertEqual(self._read_output(), b'OLD' + self._expected())
+
+    def test_pipe(self):
+        with open(self.output_path, 'wb') as stdout:
+            proc = subprocess.Popen([sys.executable, '-c', COPY_PROG], stdin=subprocess.PIPE, stdout=stdout)
+            proc.communicate(self.data)
+        self.assertEqual(proc.returncode, 0)
+        self.assertEqual(self._read_output(), self._expected())
+
+if __name__ == '__main__':
+    unittest.main()